@@ -1,12 +1,123 @@
 #!/usr/bin/env python3
 import socket
 import os
-import subprocess
+import mmap
 import re
-import platform
+import json
+import functools
 from datetime import datetime
 import sys
 import time  # added for raw-stream idle timing
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+# asyncio, subprocess and platform are imported where used: asyncio alone is most of
+# the module's import time and the plain IP capture path needs none of them
+
+_SYSTEM = 'windows' if sys.platform == 'win32' else sys.platform  # 'linux', 'darwin', ...
+_IS_WINDOWS = _SYSTEM == 'windows'
+
+_PROC_ARP = '/proc/net/arp'
+_HOME = os.path.expanduser("~")
+_ARP_CACHE = os.path.join(_HOME, ".cache", "osc", "arp.json")  # {mac: ip}
+_DEFAULT_OUTPUT_DIR = os.path.join(_HOME, "Pictures", "osc")
+# Windows ARP table patterns, matched against lower-cased `arp -a` lines
+_MAC_RE_WIN = re.compile(r'(?:[0-9a-f]{2}-){5}[0-9a-f]{2}')
+_IP_RE_WIN = re.compile(r'^([0-9]+\.[0-9]+\.[0-9]+\.[0-9]+)')
+
+_MAC_STRIP = str.maketrans('', '', ':- \t')  # separators and padding in a configured MAC
+
+_CACHED_CONNECT_TIMEOUT = 0.5  # seconds; a stale cached IP should fail fast and fall back to ARP
+_RECV_CHUNK = 1 << 16    # bytes requested per recv() call
+_RECV_BUFFER = 1 << 20   # kernel receive buffer (SO_RCVBUF) for image transfers
+_HAS_FALLOCATE = hasattr(os, 'posix_fallocate')  # not on Windows or macOS
+_O_BINARY = getattr(os, 'O_BINARY', 0)  # os.open() defaults to text mode on Windows
+
+# Fixed commands, already terminated and encoded for the wire
+_IDN_QUERY = b'*IDN?\n'
+# vendor -> (screenshot request, file extension); unknown vendors are treated as Rigol
+_VENDORS = {
+    'rigol': (b':DISPlay:DATA?\n', 'bmp'),
+    'keysight': (b':DISPlay:DATA? PNG\n', 'png'),
+    'tektronix': (b'HARDCopy:PORT ETHernet\n', 'png'),
+    'siglent': (b'SCDP\n', 'bmp'),
+}
+# Screenshot replies are '#' blocks, so they can share a message with *IDN?
+_CHAINABLE_VENDORS = frozenset(('rigol', 'keysight'))
+
+# output_prefix setting -> strftime format of the filename prefix (including the '_' separator)
+_PREFIX_FORMATS = {
+    'yyyy-mm-dd': "%Y-%m-%d_",
+    'yyyy-mm-dd-hh-mm-ss': "%Y-%m-%d-%H-%M-%S_",
+}
+
+def _load_arp_cache():
+    try:
+        with open(_ARP_CACHE) as f:
+            arp_cache = json.load(f)
+        return arp_cache if isinstance(arp_cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_arp_cache(arp_cache):
+    # Write a temp file and rename it so a concurrent run never reads half a file
+    try:
+        os.makedirs(os.path.dirname(_ARP_CACHE), exist_ok=True)
+        tmp_file = f"{_ARP_CACHE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(arp_cache, f)
+        os.replace(tmp_file, _ARP_CACHE)
+    except OSError:
+        pass  # the cache is only a shortcut
+
+def _spawn_arp():
+    import subprocess
+    return subprocess.Popen(['arp', '-a'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+def _block_digit_count(digit):
+    # '#<n>' block header: n is one ASCII digit 1-9 giving the number of length digits
+    digit_count = digit - 0x30
+    if not 0 < digit_count <= 9:
+        raise Exception("Invalid length digit in header")
+    return digit_count
+
+def _encode_command(command):
+    if isinstance(command, bytes):
+        return command
+    if not command.endswith('\n'):
+        command += '\n'
+    return command.encode()
+
+@dataclass(frozen=True)
+class OscConfig:
+    """Parsed osc.cfg; fields are normalised once here so callers can use them as-is."""
+    vendor: str
+    model: str
+    ip: str = ""
+    mac: str = ""
+    port: Optional[int] = None  # None -> vendor default
+    output_dir: str = ""
+    output_prefix: str = ""
+
+    def __post_init__(self):
+        normalised = {
+            'ip': self.ip.strip(),
+            'mac': self.mac.translate(_MAC_STRIP).lower(),
+            'output_prefix': self.output_prefix.strip().lower(),
+            # expanded once here; everything downstream uses it as-is
+            'output_dir': os.path.expanduser(self.output_dir) if self.output_dir else _DEFAULT_OUTPUT_DIR,
+        }
+        if self.port:
+            normalised['port'] = int(self.port)
+        elif self.vendor.strip().lower() in ('keysight', 'siglent'):
+            normalised['port'] = 5025
+        else:
+            normalised['port'] = 5555
+        for name, value in normalised.items():
+            object.__setattr__(self, name, value)
+
+
+_VALID_KEYS = frozenset(('vendor', 'model', 'mac', 'output_dir', 'output_prefix', 'ip', 'port'))
 
 def load_config(config_file="osc.cfg", verbose=True):
     config = {}
@@ -40,57 +151,49 @@ ip=192.168.1.100
             print(f"✓ Sample '{config_file}' created. Please edit it with your oscilloscope details.")
         return None
 
+    lines = []  # verbose output, written in one go at the end
     try:
         with open(config_file, 'r') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip().lower()
-                    value = value.strip()
-                    if key in ['vendor', 'model', 'mac', 'output_dir', 'output_prefix', 'ip', 'port']:
-                        config[key] = value
-                    else:
-                        if verbose:
-                            print(f"⚠️  Unknown config key '{key}' on line {line_num}")
+            config_lines = f.read().splitlines()
+        for line_num, line in enumerate(config_lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            key, sep, value = line.partition('=')
+            if not sep:
+                continue
+            key = key.strip().lower()
+            if key in _VALID_KEYS:
+                config[key] = value.strip()
+            else:
+                lines.append(f"⚠️  Unknown config key '{key}' on line {line_num}\n")
 
         required_fields = ['vendor', 'model']
         for field in required_fields:
             if field not in config:
+                if verbose:
+                    sys.stdout.write(''.join(lines))
                 print(f"✗ Missing required field '{field}' in {config_file}")
                 return None
 
-        if 'output_dir' not in config or not config['output_dir']:
-            config['output_dir'] = os.path.join(os.path.expanduser("~"), "Pictures", "osc")
-
-        config['output_prefix'] = config.get('output_prefix', '').strip().lower()
-        config['ip'] = config.get('ip', '').strip()
-        config['mac'] = config.get('mac', '').strip().lower().replace(':', '').replace('-', '')
-
-        if 'port' in config and config['port']:
-            config['port'] = int(config['port'])
-        elif config['vendor'].strip().lower() in ('keysight', 'siglent'):
-            config['port'] = 5025
-        else:
-            config['port'] = 5555
+        cfg = OscConfig(**config)
 
         if verbose:
-            print(f"✓ Configuration loaded: {config['vendor']} {config['model']}")
-            print(f"📂 Output directory: {config['output_dir']}")
-            if config['output_prefix']:
-                print(f"📝 Output prefix format: {config['output_prefix']}")
+            lines.append(f"✓ Configuration loaded: {cfg.vendor} {cfg.model}\n")
+            lines.append(f"📂 Output directory: {cfg.output_dir}\n")
+            if cfg.output_prefix:
+                lines.append(f"📝 Output prefix format: {cfg.output_prefix}\n")
             else:
-                print("📝 Output prefix: (none)")
-            if config['ip']:
-                print(f"🌐 Using direct IP: {config['ip']}")
-            elif config['mac']:
-                print(f"🔍 Will search ARP table for MAC: {config['mac']}")
+                lines.append("📝 Output prefix: (none)\n")
+            if cfg.ip:
+                lines.append(f"🌐 Using direct IP: {cfg.ip}\n")
+            elif cfg.mac:
+                lines.append(f"🔍 Will search ARP table for MAC: {cfg.mac}\n")
             else:
-                print("⚠️ No IP or MAC provided — connection will fail unless one is added.")
-            print(f"🔌 TCP Port: {config['port']}")
-        return config
+                lines.append("⚠️ No IP or MAC provided — connection will fail unless one is added.\n")
+            lines.append(f"🔌 TCP Port: {cfg.port}\n")
+            sys.stdout.write(''.join(lines))
+        return cfg
 
     except Exception as e:
         print(f"✗ Error reading config file: {e}")
@@ -98,83 +201,212 @@ ip=192.168.1.100
 
 
 class OscilloscopeCapture:
-    def __init__(self, vendor, model, mac_address=None, output_dir=None, output_prefix="",
-                 ip_address=None, port=5555, timeout=10, verbose=True):
-        self.vendor = vendor.lower()
-        self.model = model.upper()
-        self.mac_address = mac_address if mac_address else None
-        self.ip_address = ip_address if ip_address else None
-        self.port = port
+    def __init__(self, cfg, timeout=10, verbose=True):
+        self.vendor = cfg.vendor.lower()
+        self.model = cfg.model.upper()
+        self._screenshot_cmd, self._screenshot_ext = _VENDORS.get(self.vendor, _VENDORS['rigol'])
+        self.mac_address = cfg.mac or None
+        self.ip_address = cfg.ip or None
+        self.port = cfg.port
         self.timeout = timeout
         self.sock = None
-        self.output_dir = os.path.expanduser(output_dir or os.path.join("~", "Pictures", "osc"))
-        self.output_prefix = output_prefix
+        self.rfile = None
+        self._header = memoryview(bytearray(16))  # reused for every '#<n><length>' block header
+        self.reader = None
+        self.writer = None
+        self.output_dir = cfg.output_dir
+        self.output_prefix = cfg.output_prefix
+        self._prefix_fmt = _PREFIX_FORMATS.get(self.output_prefix)
         self.verbose = verbose
-        self.log(f"🔧 Initialized {vendor} {model} capture interface")
+        self.log(f"🔧 Initialized {cfg.vendor} {cfg.model} capture interface")
 
     def log(self, msg):
         if self.verbose:
             print(msg)
 
-    def find_ip_by_mac(self, mac_address):
+    def find_ip_by_mac(self, mac_address, arp_proc=None):
         self.log(f"🔍 Searching ARP table for MAC: {mac_address}")
         try:
             target_mac = mac_address.lower()
-            system = platform.system().lower()
-            result = subprocess.run(['arp', '-a'], capture_output=True, text=True)
-            arp_output = result.stdout
-            for line in arp_output.split('\n'):
-                if system == "windows":
-                    if 'dynamic' in line.lower():
-                        mac_match = re.search(r'([0-9a-f]{2}-){5}[0-9a-f]{2}', line.lower())
-                        if mac_match:
-                            found_mac = mac_match.group().replace('-', '').replace(':', '').lower()
-                            if found_mac == target_mac:
-                                ip_match = re.search(r'^([0-9]+\.[0-9]+\.[0-9]+\.[0-9]+)', line.strip())
-                                if ip_match:
-                                    ip_addr = ip_match.group(1)
-                                    self.log(f"✓ Found MAC in ARP table → IP: {ip_addr}")
-                                    return ip_addr
+            # Printed forms of the target, so most lines are rejected by a plain substring test
+            octets = [target_mac[i:i + 2] for i in range(0, 12, 2)]
+            target_colon = ':'.join(octets)
+            target_dash = '-'.join(octets)
+            target_short = ':'.join(octet.lstrip('0') or '0' for octet in octets)  # macOS style
+            if _SYSTEM == "linux":
+                # The kernel table is what `arp -a` prints; read it without a fork/exec
+                try:
+                    ip_addr = self._find_ip_in_proc_arp(target_colon)
+                except OSError:
+                    pass  # /proc not mounted or readable: fall back to `arp -a`
                 else:
-                    if 'ether' in line.lower():
-                        mac_match = re.search(r'([0-9a-f]{2}[:\-]){5}[0-9a-f]{2}', line.lower())
+                    if ip_addr:
+                        self.log(f"✓ Found MAC in ARP table → IP: {ip_addr}")
+                    else:
+                        self.log("✗ MAC not found in ARP table")
+                    return ip_addr
+            if arp_proc is None:
+                arp_proc = _spawn_arp()
+            # Lower-case the whole table in one pass; IPs are digits and dots either way
+            arp_output = arp_proc.communicate()[0].lower()
+            # The table format is fixed per platform, so branch once rather than per line
+            if _IS_WINDOWS:
+                for line_lower in arp_output.splitlines():
+                    if target_dash not in line_lower:
+                        continue
+                    if 'dynamic' in line_lower:
+                        mac_match = _MAC_RE_WIN.search(line_lower)
                         if mac_match:
-                            found_mac = mac_match.group().replace('-', '').replace(':', '').lower()
+                            found_mac = mac_match.group().replace('-', '')
                             if found_mac == target_mac:
-                                ip_match = re.search(r'\(([0-9]+\.[0-9]+\.[0-9]+\.[0-9]+)\)', line)
+                                ip_match = _IP_RE_WIN.search(line_lower.strip())
                                 if ip_match:
                                     ip_addr = ip_match.group(1)
                                     self.log(f"✓ Found MAC in ARP table → IP: {ip_addr}")
                                     return ip_addr
+            else:
+                for line_lower in arp_output.splitlines():
+                    # "? (192.168.1.5) at aa:bb:cc:dd:ee:ff on en0 ifscope [ethernet]"
+                    if target_colon not in line_lower and target_short not in line_lower:
+                        continue
+                    if 'ether' in line_lower:
+                        tokens = line_lower.split()
+                        if len(tokens) >= 4 and tokens[2] == 'at':
+                            # macOS drops leading zeros in each octet ("0:1a:...")
+                            found_mac = ''.join(octet.zfill(2) for octet in tokens[3].split(':'))
+                            if found_mac == target_mac:
+                                ip_addr = tokens[1].strip('()')
+                                self.log(f"✓ Found MAC in ARP table → IP: {ip_addr}")
+                                return ip_addr
             self.log("✗ MAC not found in ARP table")
             return None
         except Exception as e:
             self.log(f"✗ MAC lookup failed: {e}")
             return None
 
-    def connect(self):
+    def _find_ip_in_proc_arp(self, target_colon):
+        with open(_PROC_ARP) as f:
+            next(f, None)  # header: IP address, HW type, Flags, HW address, Mask, Device
+            for line in f:
+                # The kernel prints HW addresses as lower-case aa:bb:cc:dd:ee:ff
+                if target_colon not in line:
+                    continue
+                parts = line.split()
+                if len(parts) >= 4 and parts[3] == target_colon:
+                    return parts[0]
+        return None
+
+    def _find_mac_in_proc_arp(self, ip_address):
+        with open(_PROC_ARP) as f:
+            next(f, None)
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 4 and parts[0] == ip_address:
+                    return parts[3].replace(':', '')
+        return None
+
+    def _is_cached_ip_stale(self, ip_address):
+        # Scopes of one vendor share a port, so a TCP answer alone does not prove that a
+        # DHCP lease still points at this MAC. After the connect the kernel neighbour
+        # table holds the peer's MAC; other platforms would need `arp -a` and are trusted.
+        if _SYSTEM != "linux":
+            return False
         try:
-            if not self.ip_address:
-                if self.mac_address:
-                    self.ip_address = self.find_ip_by_mac(self.mac_address)
-                    if not self.ip_address:
-                        print("✗ Could not find device with specified MAC address")
-                        return False
-                else:
-                    print("✗ No IP address or MAC address available")
+            found_mac = self._find_mac_in_proc_arp(ip_address)
+        except OSError:
+            return False
+        # No entry (e.g. routed, or loopback): nothing to compare against
+        return found_mac is not None and found_mac != self.mac_address
+
+    def _resolve_ip(self):
+        if not self.ip_address:
+            if self.mac_address:
+                # Scope IPs rarely change: try the last address seen for this MAC first
+                arp_cache = _load_arp_cache()
+                cached_ip = arp_cache.get(self.mac_address)
+                arp_proc = None
+                if cached_ip:
+                    # Run `arp -a` while the cached IP is probed so a stale cache costs
+                    # no extra fork/exec latency (Linux reads /proc and needs no head start)
+                    if _SYSTEM != "linux":
+                        try:
+                            arp_proc = _spawn_arp()
+                        except OSError:
+                            pass
+                    sock = self._connect_cached(cached_ip)
+                    if sock is None:
+                        self.log(f"✗ Cached IP {cached_ip} not answering, searching ARP table")
+                    elif self._is_cached_ip_stale(cached_ip):
+                        sock.close()
+                        self.log(f"✗ Cached IP {cached_ip} now belongs to another device, searching ARP table")
+                    else:
+                        if arp_proc:
+                            arp_proc.kill()
+                            arp_proc.wait()
+                        self.log(f"⚡ Using cached IP for MAC {self.mac_address}: {cached_ip}")
+                        self.ip_address = cached_ip
+                        self.sock = sock
+                        return True
+                self.ip_address = self.find_ip_by_mac(self.mac_address, arp_proc)
+                if not self.ip_address:
+                    print("✗ Could not find device with specified MAC address")
                     return False
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.settimeout(self.timeout)
-            self.sock.connect((self.ip_address, self.port))
+                arp_cache[self.mac_address] = self.ip_address
+                _save_arp_cache(arp_cache)
+            else:
+                print("✗ No IP address or MAC address available")
+                return False
+        return True
+
+    def _connect_cached(self, ip_address):
+        # The probe connection becomes the session socket, so the scope sees one connection
+        try:
+            socket.inet_aton(ip_address)  # dotted quad only: a damaged cache must not cause a DNS lookup
+        except (OSError, TypeError):
+            return None
+        sock = self._new_socket()
+        sock.settimeout(_CACHED_CONNECT_TIMEOUT)
+        try:
+            sock.connect((ip_address, self.port))
+        except OSError:
+            sock.close()
+            return None
+        return sock
+
+    def _new_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Set before connect() so the larger window is advertised in the handshake
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _RECV_BUFFER)
+        return sock
+
+    def connect(self):
+        try:
+            if not self._resolve_ip():
+                return False
+            if self.sock is None:  # not already connected to a cached IP
+                self.sock = self._new_socket()
+                self.sock.settimeout(self.timeout)
+                self.sock.connect((self.ip_address, self.port))
+            else:
+                self.sock.settimeout(self.timeout)
+            # Buffered reader so small header reads are served from one recv()
+            self.rfile = self.sock.makefile('rb', buffering=_RECV_CHUNK)
             print(f"✓ Connected to {self.vendor.title()} {self.model} at {self.ip_address}:{self.port}")
             if self.mac_address:
                 self.log(f"📱 Device MAC: {self.mac_address}")
             return True
         except Exception as e:
+            if self.sock is not None and self.rfile is None:
+                self.sock.close()
+                self.sock = None
             print(f"✗ Connection failed: {e}")
             return False
 
     def disconnect(self):
+        if self.rfile:
+            self.rfile.close()
+            self.rfile = None
         if self.sock:
             self.sock.close()
             self.sock = None
@@ -183,29 +415,83 @@ class OscilloscopeCapture:
     def send_command(self, command):
         if not self.sock:
             raise Exception("Not connected to oscilloscope")
-        if not command.endswith('\n'):
-            command += '\n'
-        self.sock.send(command.encode())
+        self.sock.sendall(_encode_command(command))
 
     def query_command(self, command):
-        if not self.sock:
-            raise Exception("Not connected to oscilloscope")
-        if not command.endswith('\n'):
-            command += '\n'
-        self.sock.send(command.encode())
-        return self.sock.recv(1024).decode().strip()
+        self.send_command(command)
+        return self._read_line().decode().strip()
+
+    def query_binary(self, command):
+        """Send a query answered with an IEEE 488.2 '#' block; returns a memoryview of the payload."""
+        self.send_command(command)
+        return self._read_scpi_block()
+
+    def _read_line(self):
+        # Replies are newline terminated, however long they are
+        line = self.rfile.readline()
+        if line == b'\n':  # late terminator of an earlier block, not a reply
+            line = self.rfile.readline()
+        if not line.endswith(b'\n'):
+            raise Exception("Connection closed before end of response")
+        return line
+
+    def _read_until(self, terminators):
+        # readline() that stops at the first of several one-byte terminators (e.g. b';\n'):
+        # scan what the reader has buffered
+        parts = []
+        while True:
+            buffered = self.rfile.peek(1)
+            if not buffered:
+                raise Exception("Connection closed before end of response")
+            ends = [end for end in map(buffered.find, terminators) if end >= 0]
+            if ends:
+                parts.append(self.rfile.read(min(ends) + 1))
+                return b"".join(parts)
+            parts.append(self.rfile.read(len(buffered)))
+
+    def _read_reply_start(self):
+        # First two reply bytes land in the fixed header buffer ('#<n>' for a block)
+        if self.rfile.readinto(self._header[:2]) < 2:
+            raise Exception("Connection closed before any data")
+        if self._header[0] == 0x0A:  # late terminator of an earlier block
+            self._header[0] = self._header[1]
+            if self.rfile.readinto(self._header[1:2]) < 1:
+                raise Exception("Connection closed before any data")
+        return self._header[:2]
+
+    def _drop_block_terminator(self):
+        # Most scopes end a block with '\n', some send nothing: take it only if it is
+        # already here. A blocking wait would stall until the timeout, which also leaves
+        # rfile unusable; one arriving later is skipped before the next reply instead.
+        timeout = self.sock.gettimeout()
+        self.sock.setblocking(False)
+        try:
+            if self.rfile.peek(1)[:1] == b'\n':
+                self.rfile.read(1)
+        finally:
+            self.sock.settimeout(timeout)
+
+    def _read_block_length(self):
+        # Header buffer holds '#<n>'; n length digits follow (max 9, so '#' + 10 bytes)
+        digit_count = _block_digit_count(self._header[1])
+
+        length_str = self._header[2:2 + digit_count]
+        if self.rfile.readinto(length_str) < digit_count:
+            raise Exception("Connection closed before length")
+        return int(bytes(length_str))
+
+    def _read_scpi_block(self):
+        if self._read_reply_start()[0] != 0x23:  # '#'
+            raise Exception("Expected an IEEE 488.2 binary block")
+        # One allocation for the payload; callers slice the view without copying
+        data = memoryview(bytearray(self._read_block_length()))
+        if self.rfile.readinto(data) < len(data):
+            raise Exception("Connection closed during block transfer")
+        self._drop_block_terminator()
+        return data
 
     def get_screenshot_command(self):
-        if self.vendor == 'rigol':
-            return ":DISPlay:DATA?"
-        elif self.vendor == 'keysight':
-            return ":DISPlay:DATA? PNG"
-        elif self.vendor == 'tektronix':
-            return "HARDCopy:PORT ETHernet"
-        elif self.vendor == 'siglent':
-            return "SCDP"
-        else:
-            return ":DISPlay:DATA?"
+        return self._screenshot_cmd
 
     def get_waveform_commands(self, channel=1):
         """Returns vendor-specific commands for waveform data retrieval"""
@@ -241,93 +527,85 @@ class OscilloscopeCapture:
         if not self.sock:
             raise Exception("Not connected to oscilloscope")
         self.log("📸 Capturing screenshot...")
+        self.send_command(self._screenshot_cmd)
+        return self._receive_screenshot(filename, label)
+
+    def get_info_and_screenshot(self, filename=None, label=None):
+        """Send *IDN? and the screenshot request as one chained SCPI message (one round-trip).
+
+        Returns (info, filename). Vendors whose screenshot reply is not a '#' block, and
+        scopes that mishandle the chained message, fall back to get_info() followed by
+        get_screenshot().
+        """
+        if self.vendor not in _CHAINABLE_VENDORS:
+            return self.get_info(), self.get_screenshot(filename, label)
+        if not self.sock:
+            raise Exception("Not connected to oscilloscope")
+        self.log("📸 Capturing screenshot...")
+        try:
+            self.send_command(b'*IDN?;' + self._screenshot_cmd)
+            # Replies to chained queries are separated by ';' and share one final terminator,
+            # but some firmware ends each reply with '\n' instead
+            info = self._read_until(b';\n')[:-1].decode().strip()
+            self.log(f"📋 Oscilloscope Info: {info}")
+            return info, self._receive_screenshot(filename, label, block_only=True)
+        except Exception as e:
+            # Whatever is still in flight would be read as the next reply: start over
+            self.log(f"✗ Chained query failed ({e}), retrying as separate queries")
+            self.disconnect()
+            if not self.connect():
+                raise Exception("Could not reconnect to oscilloscope")
+            return self.get_info(), self.get_screenshot(filename, label)
+
+    def _receive_screenshot(self, filename, label, block_only=False):
         original_timeout = self.sock.gettimeout()
         self.sock.settimeout(15)
         try:
-            self.send_command(self.get_screenshot_command())
-
             # Peek first couple of bytes to detect format
-            first = b""
-            while len(first) < 2:
-                chunk = self.sock.recv(2 - len(first))
-                if not chunk:
-                    raise Exception("Connection closed before any data")
-                first += chunk
-
-            if first[:1] == b'#':
-                # ---- IEEE 488.2 definite-length block ----
-                digit_count = int(chr(first[1]))
-                if digit_count <= 0:
-                    raise Exception("Invalid length digit in header")
+            first = self._read_reply_start()
 
-                length_str = b""
-                while len(length_str) < digit_count:
-                    chunk = self.sock.recv(digit_count - len(length_str))
-                    if not chunk:
-                        raise Exception("Connection closed before length")
-                    length_str += chunk
-                data_length = int(length_str.decode())
+            if first[0] != 0x23 and block_only:
+                # Never guess at a raw stream after a chained reply: that would save garbage
+                raise Exception("Expected an IEEE 488.2 binary block after *IDN? reply")
+
+            if first[0] == 0x23:  # '#'
+                # ---- IEEE 488.2 definite-length block ----
+                data_length = self._read_block_length()
                 self.log(f"📊 Receiving {data_length} bytes of image data...")
 
-                image_data = b""
-                while len(image_data) < data_length:
-                    chunk = self.sock.recv(min(65536, data_length - len(image_data)))
-                    if not chunk:
-                        raise Exception("Connection closed during image transfer")
-                    image_data += chunk
+                with self._output_file(filename, label) as (fd, filename):
+                    self._receive_block_to_file(fd, data_length)
+                self._drop_block_terminator()
 
             else:
                 # ---- Raw image stream (e.g., Siglent SCDP) ----
                 # We already consumed `first` — include it
                 self.sock.setblocking(False)
-                chunks = [first]
+                received = len(first)
                 last_data_time = time.time()
                 idle_ms = 150        # consider complete after ~150ms idle
                 hard_timeout = 10.0  # safety cutoff
                 start = time.time()
 
-                while (time.time() - start) < hard_timeout:
-                    try:
-                        chunk = self.sock.recv(65536)
-                        if chunk:
-                            chunks.append(chunk)
+                chunk = memoryview(bytearray(_RECV_CHUNK))
+                with self._output_file(filename, label) as (fd, filename):
+                    os.write(fd, first)
+                    while (time.time() - start) < hard_timeout:
+                        # readinto1() drains the reader's buffer first and returns None
+                        # (or 0 at EOF) when the non-blocking socket has nothing more for us
+                        n = self.rfile.readinto1(chunk)
+                        if n:
+                            os.write(fd, chunk[:n])
+                            received += n
                             last_data_time = time.time()
                         else:
+                            if (time.time() - last_data_time) * 1000 >= idle_ms:
+                                break
                             time.sleep(0.01)
-                    except BlockingIOError:
-                        if (time.time() - last_data_time) * 1000 >= idle_ms:
-                            break
-                        time.sleep(0.01)
 
                 self.sock.setblocking(True)
-                image_data = b"".join(chunks)
-                self.log(f"📊 Received raw image stream: {len(image_data)} bytes")
-
-            # Filename handling (your existing prefix/label/counter logic)
-            if filename is None:
-                os.makedirs(self.output_dir, exist_ok=True)
-                prefix = ""
-                if self.output_prefix == "yyyy-mm-dd":
-                    prefix = datetime.now().strftime("%Y-%m-%d")
-                elif self.output_prefix == "yyyy-mm-dd-hh-mm-ss":
-                    prefix = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-                base_name_part = label if label else self.model.lower()
-                if prefix:
-                    base_name = f"{prefix}_{base_name_part}"
-                else:
-                    base_name = base_name_part
-                ext = self.get_default_extension()
-                counter = 1
-                while True:
-                    candidate = os.path.join(self.output_dir, f"{base_name}_{counter:02d}.{ext}")
-                    if not os.path.exists(candidate):
-                        filename = candidate
-                        break
-                    counter += 1
+                self.log(f"📊 Received raw image stream: {received} bytes")
 
-            with open(filename, 'wb') as f:
-                f.write(image_data)
-            print(f"✓ Screenshot saved as: {filename}")
             return filename
         finally:
             # restore socket state
@@ -337,27 +615,184 @@ class OscilloscopeCapture:
                 pass
             self.sock.settimeout(original_timeout)
 
+    def _next_filenames(self, label=None):
+        # Filename handling (your existing prefix/label/counter logic)
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = datetime.now().strftime(self._prefix_fmt) if self._prefix_fmt else ""
+        base_name = prefix + (label if label else self.model.lower())
+        ext = self._screenshot_ext
+        # One directory listing instead of a stat() per existing screenshot; casefolded
+        # because Windows and macOS filesystems treat X_01.BMP and x_01.bmp as one file
+        existing = {name.casefold() for name in os.listdir(self.output_dir)}
+        counter = 1
+        while f"{base_name}_{counter:02d}.{ext}".casefold() in existing:
+            counter += 1
+        # Candidates from the lowest free counter upward, in case one is taken after the listing
+        while True:
+            yield os.path.join(self.output_dir, f"{base_name}_{counter:02d}.{ext}")
+            counter += 1
+
+    @contextmanager
+    def _output_file(self, filename=None, label=None):
+        """Open the screenshot file for os.write()/mmap; remove it if the transfer fails."""
+        if filename is None:
+            for filename in self._next_filenames(label):
+                try:
+                    # O_EXCL: never overwrite a file created since the listing
+                    fd = os.open(filename, os.O_RDWR | os.O_CREAT | os.O_EXCL | _O_BINARY, 0o644)
+                    break
+                except FileExistsError:
+                    continue
+        else:
+            fd = os.open(filename, os.O_RDWR | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+        try:
+            yield fd, filename
+        except BaseException:
+            os.close(fd)
+            os.remove(filename)
+            raise
+        os.close(fd)
+        print(f"✓ Screenshot saved as: {filename}")
+
+    def _receive_block_to_file(self, fd, data_length):
+        # Reserve the space and map the file, so the reader fills the page cache
+        # directly; the kernel writes it back after close (no msync needed).
+        # Only map blocks that were really allocated: a page fault on a sparse file
+        # with the disk full is SIGBUS, which kills the process before any cleanup.
+        mm = None
+        if _HAS_FALLOCATE and data_length:
+            try:
+                os.posix_fallocate(fd, 0, data_length)
+                mm = mmap.mmap(fd, data_length, access=mmap.ACCESS_WRITE)
+            except (OSError, ValueError):  # no space, unsupported filesystem or mmap unavailable
+                os.ftruncate(fd, 0)
+
+        if mm is not None:
+            with mm, memoryview(mm) as view:
+                if self.rfile.readinto(view) < data_length:
+                    raise Exception("Connection closed during image transfer")
+            return
+
+        # Fallback: stream to disk through one reusable chunk buffer
+        chunk = memoryview(bytearray(_RECV_CHUNK))
+        remaining = data_length
+        while remaining:
+            n = self.rfile.readinto(chunk[:min(_RECV_CHUNK, remaining)])
+            if not n:
+                raise Exception("Connection closed during image transfer")
+            os.write(fd, chunk[:n])
+            remaining -= n
+
     def get_default_extension(self):
-        if self.vendor == 'rigol':
-            return 'bmp'
-        elif self.vendor == 'keysight':
-            return 'png'
-        elif self.vendor == 'tektronix':
-            return 'png'
-        elif self.vendor == 'siglent':
-            return 'bmp'
-        return 'bmp'
+        return self._screenshot_ext
 
     def get_info(self):
         try:
-            info = self.query_command("*IDN?")
+            info = self.query_command(_IDN_QUERY)
             self.log(f"📋 Oscilloscope Info: {info}")
             return info
         except Exception as e:
             self.log(f"✗ Failed to get info: {e}")
             return None
 
+    # ---- asyncio variants: capture several scopes from one thread ----
+    # e.g. await asyncio.gather(*(s.aget_screenshot() for s in scopes))
+
+    async def aconnect(self):
+        """Async counterpart of connect(); pair with aget_screenshot()/adisconnect()."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        sock = None
+        try:
+            # ARP lookup shells out, keep it off the event loop
+            if not await loop.run_in_executor(None, self._resolve_ip):
+                return False
+            sock, self.sock = self.sock, None  # set when the cached IP answered
+            if sock is None:
+                sock = self._new_socket()
+                sock.setblocking(False)
+                await asyncio.wait_for(loop.sock_connect(sock, (self.ip_address, self.port)), self.timeout)
+            else:
+                sock.setblocking(False)
+            self.reader, self.writer = await asyncio.open_connection(sock=sock, limit=_RECV_CHUNK)
+            print(f"✓ Connected to {self.vendor.title()} {self.model} at {self.ip_address}:{self.port}")
+            if self.mac_address:
+                self.log(f"📱 Device MAC: {self.mac_address}")
+            return True
+        except Exception as e:
+            if sock is not None and self.writer is None:
+                sock.close()
+            print(f"✗ Connection failed: {e}")
+            return False
+
+    async def adisconnect(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+            self.reader = self.writer = None
+            print("✓ Disconnected from oscilloscope")
+
+    async def aget_screenshot(self, filename=None, label=None):
+        """Async counterpart of get_screenshot()."""
+        import asyncio
+        if not self.writer:
+            raise Exception("Not connected to oscilloscope")
+        self.log("📸 Capturing screenshot...")
+        self.writer.write(self._screenshot_cmd)
+        await self.writer.drain()
+
+        timeout = 15
+        try:
+            first = await asyncio.wait_for(self.reader.readexactly(2), timeout)
+            if first[:1] == b'\n':  # terminator of an earlier block
+                first = first[1:] + await asyncio.wait_for(self.reader.readexactly(1), timeout)
+        except asyncio.IncompleteReadError:
+            raise Exception("Connection closed before any data")
+
+        if first[:1] == b'#':
+            # ---- IEEE 488.2 definite-length block ----
+            digit_count = _block_digit_count(first[1])
+            try:
+                length_str = await asyncio.wait_for(self.reader.readexactly(digit_count), timeout)
+                data_length = int(length_str)
+                self.log(f"📊 Receiving {data_length} bytes of image data...")
+                with self._output_file(filename, label) as (fd, filename):
+                    remaining = data_length
+                    while remaining:
+                        chunk = await asyncio.wait_for(
+                            self.reader.readexactly(min(_RECV_CHUNK, remaining)), timeout)
+                        os.write(fd, chunk)
+                        remaining -= len(chunk)
+                # The block's '\n' terminator, if the scope sends one, is not waited
+                # for; the next reply skips it
+            except asyncio.IncompleteReadError:
+                raise Exception("Connection closed during image transfer")
+        else:
+            # ---- Raw image stream (e.g., Siglent SCDP): done after ~150ms idle ----
+            loop = asyncio.get_running_loop()
+            received = len(first)
+            deadline = loop.time() + 10.0
+            with self._output_file(filename, label) as (fd, filename):
+                os.write(fd, first)
+                while loop.time() < deadline:
+                    try:
+                        chunk = await asyncio.wait_for(self.reader.read(_RECV_CHUNK), 0.15)
+                    except asyncio.TimeoutError:
+                        break
+                    if not chunk:
+                        break
+                    os.write(fd, chunk)
+                    received += len(chunk)
+            self.log(f"📊 Received raw image stream: {received} bytes")
+
+        return filename
+
+@functools.lru_cache(maxsize=1)
 def _is_wsl():
+    import platform
     try:
         return 'microsoft' in platform.uname().release.lower() or 'microsoft' in platform.version().lower()
     except Exception:
@@ -374,10 +809,10 @@ def main():
             print("✗ Could not load configuration. Please check osc.cfg file.")
             return
 
-        output_dir = os.path.expanduser(config.get('output_dir', os.path.join("~", "Pictures", "osc")))
+        import subprocess
+        output_dir = config.output_dir
         os.makedirs(output_dir, exist_ok=True)
 
-        system = platform.system().lower()
         if _is_wsl():
             # Convert to Windows path and open in Explorer
             try:
@@ -386,39 +821,43 @@ def main():
                 subprocess.run(["explorer.exe", win_path])
             except Exception as e:
                 print(f"✗ Failed to open folder from WSL: {e}")
-        elif system == "windows":
+        elif _IS_WINDOWS:
             os.startfile(output_dir)
-        elif system == "darwin":
+        elif _SYSTEM == "darwin":
             subprocess.run(["open", output_dir])
         else:
             subprocess.run(["xdg-open", output_dir])
         return
 
     if "-h" in sys.argv:
-        config = load_config("osc.cfg", verbose=False) or {}
-        save_loc = os.path.expanduser(config.get('output_dir', os.path.join("~", "Pictures", "osc")))
-        prefix_fmt = config.get('output_prefix', '').strip().lower() or "(none)"
-        scope_parts = [config.get('vendor', ''), config.get('model', '')]
-        if config.get('ip'): scope_parts.append(config['ip'])
-        if config.get('mac'): scope_parts.append(config['mac'])
-        if config.get('port'): scope_parts.append(str(config['port']))
+        config = load_config("osc.cfg", verbose=False)
+        if config:
+            save_loc = config.output_dir
+            prefix_fmt = config.output_prefix or "(none)"
+            scope_parts = [config.vendor, config.model, config.ip, config.mac, str(config.port)]
+        else:
+            save_loc = _DEFAULT_OUTPUT_DIR
+            prefix_fmt = "(none)"
+            scope_parts = []
         scope_line = " / ".join([p for p in scope_parts if p])
 
-        print("Usage: osc [label] [-v] [-o] [-h]\n")
-        print("Options:")
-        print("  label        Optional filename label instead of model name (spaces become underscores)")
-        print("  -v           Verbose mode, shows detailed connection and capture info")
-        print("  -o           Opens the screenshot output directory without taking a screenshot")
-        print("  -h           Shows this help message\n")
-        print("Details:")
-        print(f"  Oscilloscope: {scope_line}")
-        print(f"  Save location: {save_loc}")
-        print(f"  Prefix format: {prefix_fmt}\n")
-        print("Examples:")
-        print("  osc testlabel")
-        print("  osc -v mylabel")
-        print("  osc -o")
-        print("  osc")
+        sys.stdout.write(
+            "Usage: osc [label] [-v] [-o] [-h]\n\n"
+            "Options:\n"
+            "  label        Optional filename label instead of model name (spaces become underscores)\n"
+            "  -v           Verbose mode, shows detailed connection and capture info\n"
+            "  -o           Opens the screenshot output directory without taking a screenshot\n"
+            "  -h           Shows this help message\n\n"
+            "Details:\n"
+            f"  Oscilloscope: {scope_line}\n"
+            f"  Save location: {save_loc}\n"
+            f"  Prefix format: {prefix_fmt}\n\n"
+            "Examples:\n"
+            "  osc testlabel\n"
+            "  osc -v mylabel\n"
+            "  osc -o\n"
+            "  osc\n"
+        )
         return
 
     verbose = "-v" in sys.argv
@@ -428,21 +867,11 @@ def main():
     if not config:
         print("✗ Could not load configuration. Please check osc.cfg file.")
         return
-    scope = OscilloscopeCapture(
-        vendor=config['vendor'],
-        model=config['model'],
-        mac_address=config.get('mac', None),
-        output_dir=config.get('output_dir'),
-        output_prefix=config.get('output_prefix', ""),
-        ip_address=config.get('ip', ""),
-        port=config.get('port', 5555),
-        verbose=verbose
-    )
+    scope = OscilloscopeCapture(config, verbose=verbose)
     try:
         if not scope.connect():
             return
-        scope.get_info()
-        scope.get_screenshot(label=label_arg)
+        scope.get_info_and_screenshot(label=label_arg)
     except Exception as e:
         print(f"✗ Error: {e}")
     finally:
@@ -6,28 +6,110 @@ import argparse
 import sys
 import subprocess
 import platform
+import functools
+import threading
+from concurrent.futures import Future
+
+_SYSTEM = platform.system()
+KNOWN_VIDS = ("0X1AB1", "0X2A8D", "0X0957")  # USB vendor IDs: Rigol, Keysight, Agilent/legacy Keysight
+_CHUNK_SIZE = 1 << 16  # bytes per VISA read while streaming the image
+_O_BINARY = getattr(os, "O_BINARY", 0)  # os.open() defaults to text mode on Windows
+
+def _open_win(path: Path):
+    os.startfile(path)
+
+def _open_mac(path: Path):
+    subprocess.run(["open", path])
+
+def _open_xdg(path: Path):  # Linux and others
+    subprocess.run(["xdg-open", path])
 
 def open_folder(path: Path):
-    if platform.system() == "Windows":
-        os.startfile(path)
-    elif platform.system() == "Darwin":  # macOS
-        subprocess.run(["open", path])
-    else:  # Linux and others
-        subprocess.run(["xdg-open", path])
+    {"Windows": _open_win, "Darwin": _open_mac}.get(_SYSTEM, _open_xdg)(path)
+
+def _probe(rm, res):
+    """Open one VISA resource and keep it only if it identifies as a supported scope."""
+    try:
+        inst = rm.open_resource(res)
+    except Exception:
+        return None, None
+    try:
+        idn = inst.query("*IDN?").strip()
+        if any(key in idn.upper() for key in ["RIGOL", "DHO", "KEYSIGHT", "MXR", "AGILENT"]):
+            return inst, idn
+    except Exception:
+        pass
+    try:
+        inst.close()
+    except Exception:
+        pass  # e.g. a session already broken by a timeout
+    return None, None
+
+def _run_probe(fut, rm, res):
+    # Always resolve the Future: find_supported_scope() blocks on it
+    try:
+        fut.set_result(_probe(rm, res))
+    except BaseException as e:
+        fut.set_exception(e)
+
+def _start_probe(rm, res) -> Future:
+    # A daemon thread rather than an executor worker: executor threads are joined at
+    # interpreter exit, so a probe stuck in a VISA timeout would still delay the CLI
+    # (its session stays open until it finishes or the process exits)
+    fut = Future()
+    threading.Thread(target=_run_probe, args=(fut, rm, res), daemon=True).start()
+    return fut
+
+@functools.lru_cache(maxsize=1)
+def _resource_manager():
+    # Loading the VISA backend is slow; create it once and keep it open for the
+    # lifetime of the process (it is never closed explicitly)
+    return pyvisa.ResourceManager()
 
 def find_supported_scope():
-    rm = pyvisa.ResourceManager()
-    for res in rm.list_resources():
-        try:
-            inst = rm.open_resource(res)
-            idn = inst.query("*IDN?").strip()
-            if any(key in idn.upper() for key in ["RIGOL", "DHO", "KEYSIGHT", "MXR", "AGILENT"]):
+    rm = _resource_manager()
+    # Only LAN/USB instruments can be supported scopes; skip serial ports and GPIB adapters
+    resources = [res for res in rm.list_resources() if res.startswith(("TCPIP", "USB"))]
+    # USB resource strings carry the vendor ID, so unknown USB devices need not be opened at all
+    known = [res for res in resources
+             if res.startswith("TCPIP") or any(vid in res.upper() for vid in KNOWN_VIDS)]
+    resources = known or resources
+    if not resources:
+        return None, None
+
+    # Query all candidates at once, but take the results in list order: the first listed
+    # scope wins as with a serial scan, and probes listed after it are not waited for
+    futures = [_start_probe(rm, res) for res in resources]
+    found = None, None
+    try:
+        for res, fut in zip(resources, futures):
+            inst, idn = fut.result()
+            if inst:
                 print(f"Connected to: {idn} ({res})")
-                return inst, idn
-            inst.close()
-        except Exception:
-            continue
-    return None, None
+                found = inst, idn
+                break
+    finally:
+        # Close any other match, now or when its probe finishes
+        def _close_extra(fut):
+            if fut.exception() is not None:
+                return
+            inst = fut.result()[0]
+            if inst is not None and inst is not found[0]:
+                try:
+                    inst.close()
+                except Exception:
+                    pass
+        for fut in futures:
+            fut.add_done_callback(_close_extra)
+    return found
+
+def _read_block_length(read_bytes, first):
+    # Parse SCPI binary block header: '#<n>' (the first two bytes) followed by n
+    # length digits. Same arithmetic as OscilloscopeCapture._read_block_length in
+    # osc/osc.py. Returns None if the reply is not a definite-length block.
+    if first[:1] != b'#' or first[1:2] in (b'', b'0'):
+        return None
+    return int(read_bytes(int(first[1:2])))
 
 def capture_screenshot(scope, idn, filename):
     scope.timeout = 10000  # 10-second timeout
@@ -35,38 +117,49 @@ def capture_screenshot(scope, idn, filename):
     if "RIGOL" in idn and "DHO" in idn:
         scope.write(":DISP:DATA:FORM PNG")
         scope.write(":DISP:DATA?")
-        raw_data = scope.read_raw()
-
-        # Parse SCPI binary block header
-        if raw_data.startswith(b'#'):
-            header_length = int(raw_data[1:2])
-            data_start = 2 + header_length
-            raw_data = raw_data[data_start:]
 
     elif "KEYSIGHT" in idn or "AGILENT" in idn:
         scope.write(":DISPlay:DATA? PNG, SCREEN")
-        raw_data = scope.read_raw()
-
-        if raw_data.startswith(b'#'):
-            header_length = int(raw_data[1:2])
-            data_len = int(raw_data[2:2 + header_length])
-            raw_data = raw_data[2 + header_length : 2 + header_length + data_len]
 
     else:
         raise Exception("Unsupported scope type.")
 
-    with open(filename, "wb") as f:
-        f.write(raw_data)
+    # Stream the image to disk chunk by chunk instead of holding it all in memory
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+    try:
+        header = scope.read_bytes(2)
+        remaining = _read_block_length(scope.read_bytes, header)
+        if remaining is None:
+            # Not a definite-length block: keep whatever the scope sent
+            if not header.startswith(b'#'):
+                os.write(fd, header)
+            os.write(fd, scope.read_raw())
+        while remaining:
+            chunk = scope.read_bytes(min(_CHUNK_SIZE, remaining))
+            os.write(fd, chunk)
+            remaining -= len(chunk)
+    except BaseException:
+        os.close(fd)
+        os.remove(filename)
+        raise
+    os.close(fd)
 
 def build_filename(folder: Path, label: str) -> Path:
     today_str = datetime.datetime.now().strftime("%Y_%m_%d")
-    base_filename = f"{today_str}_{label}"
-    counter = 1
-    filename = folder / f"{base_filename}_{counter:02}.png"
-    while filename.exists():
-        counter += 1
-        filename = folder / f"{base_filename}_{counter:02}.png"
-    return filename
+    prefix = f"{today_str}_{label}_"
+    suffix = ".png"
+    # One directory listing instead of a stat() per existing screenshot. Casefolded,
+    # as Windows treats ..._Test_01.png and ..._test_01.png as the same file.
+    match_prefix = prefix.casefold()
+    counter = 0
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            name = entry.name.casefold()
+            if name.startswith(match_prefix) and name.endswith(suffix):
+                number = name[len(match_prefix):-len(suffix)]
+                if number.isdigit():
+                    counter = max(counter, int(number))
+    return folder / f"{prefix}{counter + 1:02}{suffix}"
 
 def main():
     parser = argparse.ArgumentParser(description="Oscilloscope screenshot tool (Rigol DHO, Keysight MXR)")